@@ -1,32 +1,170 @@
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+import re
+from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
+import numpy as np
 import pandas as pd
 import aiohttp, asyncio
+import importlib.util
+from collections.abc import Sequence
+import orjson
 import os
+import time
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pacsv
+except ImportError:
+    pa = None
+# aiohttp can only decode brotli responses with one of these installed
+if any(importlib.util.find_spec(name) for name in ("brotli", "brotlicffi")):
+    ACCEPT_ENCODING = "br, gzip"
+else:
+    ACCEPT_ENCODING = "gzip"
 CACHE_DIR = "cache"
+CSV_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+# Seconds an in-process cached API response is used without revalidating it
+RESPONSE_CACHE_TTL = 3600
+TOKEN_RE = re.compile(rb'name="__RequestVerificationToken"[^>]*value="([^"]+)"')
+HOURLY_DATA_COLUMNS = ['TimeStamp', 'Consumption', 'FixedConsumption', 'OpenConsumption',
+                       'SpotPrice', 'FixedPrice', 'ProfilePrice', 'DeliveryPrice']
+HOURLY_DATA_DTYPES = {column: 'float64' for column in HOURLY_DATA_COLUMNS[1:]}
+AGGREGATE_COLUMNS = ['SpotPrice', 'FixedPrice', 'ProfilePrice', 'DeliveryPrice',
+                     'Consumption', 'FixedConsumption', 'OpenConsumption']
+
+def parse_timestamp(value, time_zone):
+    """Parse a PKS API timestamp (``%Y-%m-%dT%H:%M:%SZ``, always UTC).
+
+    The format is fixed, so the fields are sliced directly instead of going
+    through ``datetime.strptime``.
+
+    :param value: Timestamp string
+    :type value: str
+    :param time_zone: Time zone to convert the timestamp to
+    :type time_zone: ZoneInfo
+    :return: Timezone aware datetime
+    :rtype: datetime
+    """
+    return datetime(int(value[:4]), int(value[5:7]), int(value[8:10]),
+                    int(value[11:13]), int(value[14:16]), int(value[17:19]),
+                    tzinfo=timezone.utc).astimezone(time_zone)
+
+
+def run_sync(method, *args, **kwargs):
+    """Run an async method of a PksLive model object to completion.
+
+    The coroutine is run in its own event loop, and the loop bound resources
+    of the owning :class:`PksLive` are released before the loop is closed.
+
+    :param method: Bound async method, e.g. ``contract.get_invoicing_periods``
+    :type method: coroutine function
+    :return: The result of the coroutine
+    :raises RuntimeError: if called from a running event loop
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError(f"Cannot block on {method.__name__}() inside a running event loop, "
+                           f"use 'await {method.__name__}()' instead")
+    live = method.__self__
+    while not isinstance(live, PksLive):
+        live = live.parent
+
+    async def run():
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            await live.aclose()
+    return asyncio.run(run())
+
 
 class PksLive:
     """PKS Live API client.
 
     :param username: PKS Live username
     :param password: PKS Live password
+    :param keep_rawdata: Keep the raw API data in the ``rawdata`` attribute of the returned objects
     :type username: str
     :type password: str
+    :type keep_rawdata: bool
     :return: PKS Live API client
     :rtype: PksLive
 
     Usage:
     pks = PksLive(username, password)
     """
-    def __init__(self, username, password):
+    def __init__(self, username, password, keep_rawdata=False):
         self.api_url = "https://live.pks.fi/Api"
         self.username = username
         self.password = password
+        self.keep_rawdata = keep_rawdata
         self.login_url = "https://oma.pks.fi/eServices/Online/Login"
         self.live_login_url = "https://oma.pks.fi/eServices/Online/MoveToPKSLiveUser"
         self.session = self.login(username, password)
+        self._aiohttp_session = None
+        self.semaphore = asyncio.Semaphore(8)
+        self._response_cache = {}
+
+    @property
+    def aiohttp_session(self):
+        """Get the shared aiohttp session.
+
+        The session is created lazily (it needs a running event loop) and
+        reuses the headers and cookies of the logged in requests session, so
+        that all the async requests share the same connection pool. Responses
+        are requested compressed (brotli only if it can be decoded).
+
+        :return: aiohttp session
+        :rtype: aiohttp.ClientSession
+        """
+        if self._aiohttp_session is None or self._aiohttp_session.closed:
+            connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=75)
+            headers = dict(self.session.headers)
+            headers['Accept-Encoding'] = ACCEPT_ENCODING
+            self._aiohttp_session = aiohttp.ClientSession(headers=headers,
+                                                          cookies=self.session.cookies.get_dict(),
+                                                          connector=connector)
+        return self._aiohttp_session
+
+    async def aclose(self):
+        """Close the shared aiohttp session."""
+        if self._aiohttp_session is not None:
+            await self._aiohttp_session.close()
+            self._aiohttp_session = None
+        # The semaphore binds to the running event loop, start afresh for the next one
+        self.semaphore = asyncio.Semaphore(8)
+
+    async def get_cached_json(self, url, expire_after=RESPONSE_CACHE_TTL):
+        """GET a JSON endpoint through an in-process, ETag aware cache.
+
+        A cached response younger than ``expire_after`` seconds is returned
+        without a request. Older entries are revalidated with
+        ``If-None-Match`` and reused when the server answers 304.
+
+        :param url: Endpoint URL
+        :type url: str
+        :param expire_after: Seconds to use a cached response without revalidating it
+        :type expire_after: int
+        :return: Decoded JSON data
+        :raises aiohttp.ClientResponseError: on an HTTP error status
+        """
+        now = time.monotonic()
+        cached = self._response_cache.get(url)
+        if cached is not None and cached[2] > now:
+            return cached[1]
+        headers = {}
+        if cached is not None and cached[0]:
+            headers['If-None-Match'] = cached[0]
+        async with self.aiohttp_session.get(url, headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                etag, data = cached[0], cached[1]
+            else:
+                response.raise_for_status()
+                etag, data = response.headers.get('ETag'), orjson.loads(await response.read())
+        self._response_cache[url] = (etag, data, now + expire_after)
+        return data
 
 
     def login(self, username, password):
@@ -40,8 +178,11 @@ class PksLive:
         """
         session = requests.Session()
         response = session.get(self.login_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        token = soup.find("input", {"name": "__RequestVerificationToken"})['value']
+        match = TOKEN_RE.search(response.content)
+        if match is None:
+            print("Login failed: verification token not found")
+            return None
+        token = match.group(1).decode()
         payload = {
             "__RequestVerificationToken": token,
             "UserName": username,
@@ -69,7 +210,7 @@ class PksLive:
             response = self.session.get(f"{self.api_url}/Customer")
             response.raise_for_status()
             data = response.json()[0]
-            return Customer(parent=self, **data)
+            return Customer(parent=self, keep_rawdata=self.keep_rawdata, **data)
         except requests.RequestException as e:
             print(f"Error: {e}")
             return None
@@ -97,12 +238,18 @@ class Customer:
 
     :param parent: Parent object
     :type parent: PksLive
+    :param keep_rawdata: Keep the raw API data in ``rawdata``
+    :type keep_rawdata: bool
     :param kwargs: Customer data
     :type kwargs: dict
     :return: Customer object
     :rtype: Customer
     """
-    def __init__(self, parent, **kwargs):
+    __slots__ = ('address', '_contracts', '_contracts_data', 'id', 'customercode', 'firstname',
+                 'lastname', 'companyname', 'email', 'phone', 'identifier', 'addressid',
+                 'maincustomerid', 'rawdata', 'parent', 'api_url', 'session')
+
+    def __init__(self, parent, keep_rawdata=False, **kwargs):
         self.address = kwargs.get('Address', None)
         self._contracts = None
         self._contracts_data = kwargs.get('Contracts', []) or []
@@ -116,7 +263,7 @@ class Customer:
         self.identifier = kwargs.get('Identifier', None)
         self.addressid = kwargs.get('AddressId', None)
         self.maincustomerid = kwargs.get('MainCustomerId', None)
-        self.rawdata = kwargs
+        self.rawdata = kwargs if keep_rawdata else None
         self.parent = parent
         self.api_url = self.parent.api_url
         self.session = self.parent.session
@@ -127,29 +274,68 @@ class Customer:
 
         :param parent: Parent object
         :type parent: Customer
-        :return: List of Contract objects
-        :rtype: list
+        :return: Lazily built Contract objects
+        :rtype: ContractList
         """
-        if self._contracts:
-            return self._contracts
-        self._contracts = [Contract(parent=self, **data) for data in self._contracts_data]
+        if self._contracts is None:
+            self._contracts = ContractList(self, self._contracts_data)
         return self._contracts
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.id} - {self.firstname} {self.lastname})"
 
 
+class ContractList(Sequence):
+    """Read-only list of a customer's contracts.
+
+    Each Contract is only built the first time it is accessed.
+
+    :param parent: Parent object
+    :type parent: Customer
+    :param contracts_data: Contract data as returned by the API
+    :type contracts_data: list
+    :return: ContractList object
+    :rtype: ContractList
+    """
+    __slots__ = ('parent', '_contracts_data', '_contracts')
+
+    def __init__(self, parent, contracts_data):
+        self.parent = parent
+        self._contracts_data = contracts_data
+        self._contracts = [None] * len(contracts_data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self._contracts[index] is None:
+            self._contracts[index] = Contract(parent=self.parent, keep_rawdata=self.parent.parent.keep_rawdata,
+                                              **self._contracts_data[index])
+        return self._contracts[index]
+
+    def __len__(self):
+        return len(self._contracts_data)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} contracts)"
+
+
 class Contract:
     """Contract object.
 
     :param parent: Parent object
     :type parent: Customer
+    :param keep_rawdata: Keep the raw API data in ``rawdata``
+    :type keep_rawdata: bool
     :param kwargs: Contract data
     :type kwargs: dict
     :return: Contract object
     :rtype: Contract
     """
-    def __init__(self, parent, **kwargs):
+    __slots__ = ('id', 'meteringpointid', 'meteringpoint', 'created', 'contractcode', 'start',
+                 'stop', 'product', 'parent', 'api_url', 'session', 'customer', 'rawdata',
+                 '_invoicing_periods')
+
+    def __init__(self, parent, keep_rawdata=False, **kwargs):
         self.id = kwargs.get('Id', None)
         self.meteringpointid = kwargs.get('MeteringPointId', None)
         self.meteringpoint = kwargs.get('MeteringPoint', None)
@@ -162,30 +348,51 @@ class Contract:
         self.api_url = self.parent.api_url
         self.session = self.parent.session
         self.customer = self.parent
-        self.rawdata = kwargs
+        self.rawdata = kwargs if keep_rawdata else None
         self._invoicing_periods = None
 
 
     async def get_invoicing_periods(self):
         if self._invoicing_periods is not None:
             return self._invoicing_periods
-        async with aiohttp.ClientSession(headers=self.session.headers, cookies=self.session.cookies.get_dict()) as session:
-            url = f"{self.api_url}/Periods/InvoicingPeriod/Available"
-            async with session.get(url) as response:
-                if response.status == 200:
-                    periods_data = await response.json()
-                    # Concurrently initialize InvoicingPeriod instances
-                    tasks = [self.initialize_invoicing_period(data) for data in periods_data]
-                    self._invoicing_periods = await asyncio.gather(*tasks)
-                    return self._invoicing_periods
-                else:
-                    print(f'ERROR: {response.status}')
-                    return None
+        url = f"{self.api_url}/Periods/InvoicingPeriod/Available"
+        try:
+            periods_data = await self.parent.parent.get_cached_json(url)
+        except aiohttp.ClientResponseError as e:
+            print(f'ERROR: {e.status}')
+            return None
+        # Concurrently initialize InvoicingPeriod instances
+        tasks = [self.initialize_invoicing_period(data) for data in periods_data]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        periods = []
+        for result in results:
+            # CancelledError is a BaseException and is returned as a result too
+            if isinstance(result, BaseException):
+                print(f'ERROR: {result!r}')
+            else:
+                periods.append(result)
+        # Only cache a complete result, so that failed periods (including the ones whose
+        # hourly data request failed and left hourly_data unset) are retried on the next call
+        if len(periods) == len(results) and all(period.hourly_data is not None for period in periods):
+            self._invoicing_periods = periods
+        return periods
+
+    def fetch_invoicing_periods_sync(self):
+        """Blocking version of :meth:`get_invoicing_periods`.
+
+        Closes the shared aiohttp session when done and cannot be called from
+        a running event loop.
+
+        :return: List of InvoicingPeriod objects
+        :rtype: list
+        """
+        return run_sync(self.get_invoicing_periods)
 
     async def initialize_invoicing_period(self, data):
-        period = InvoicingPeriod(parent=self, **data)
+        period = InvoicingPeriod(parent=self, keep_rawdata=self.parent.parent.keep_rawdata, **data)
         print(f"Fetching hourly data for {period.description}")
-        await period.get_hourly_data()
+        async with self.parent.parent.semaphore:
+            await asyncio.gather(period.get_hourly_data(), period.get_vat_percentage())
         return period
 
 
@@ -198,24 +405,32 @@ class InvoicingPeriod:
 
     :param parent: Parent object
     :type parent: Contract
+    :param keep_rawdata: Keep the raw API data in ``rawdata``
+    :type keep_rawdata: bool
     :param kwargs: InvoicingPeriod data
     :type kwargs: dict
     :return: InvoicingPeriod object
     :rtype: InvoicingPeriod
     """
-    def __init__(self, parent, **kwargs):
+    __slots__ = ('parent', 'api_url', 'session', 'id', 'description', 'start', 'stop', 'hourly_data',
+                 'rawdata', 'current_month', '_average_spot_price', '_average_fixed_price',
+                 '_profile_price', '_delivery_price', '_weighted_spot_price', '_total_spot_price',
+                 '_total_weighted_spot_price', '_total_fixed_price', '_open_consumption_cost',
+                 '_fixed_consumption_cost', '_what_if_spot_cost', '_total_consumption',
+                 '_total_fixed_consumption', '_total_open_consumption', '_vat_percentage')
+    time_zone = ZoneInfo("Europe/Helsinki")
+
+    def __init__(self, parent, keep_rawdata=False, **kwargs):
         self.parent = parent
         self.api_url = self.parent.api_url
         self.session = self.parent.session
         self.id = kwargs.get('Id', None)
         self.description = kwargs.get('Description', None)
-        self.time_zone = ZoneInfo("Europe/Helsinki")
-        self.start = datetime.strptime(kwargs.get('Start', None),
-                    "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=ZoneInfo("UTC")).astimezone(self.time_zone)
-        self.stop = datetime.strptime(kwargs.get('Stop', None),
-                    "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=ZoneInfo("UTC")).astimezone(self.time_zone)
+        self.start = parse_timestamp(kwargs.get('Start', None), self.time_zone)
+        self.stop = parse_timestamp(kwargs.get('Stop', None), self.time_zone)
         self.hourly_data = None
-        self.rawdata = kwargs
+        self.rawdata = kwargs if keep_rawdata else None
+        self.current_month = None
         self._average_spot_price = None
         self._average_fixed_price = None
         self._profile_price = None
@@ -231,8 +446,6 @@ class InvoicingPeriod:
         self._total_fixed_consumption = None
         self._total_open_consumption = None
         self._vat_percentage = None
-        self.session_headers = {k: v for k, v in self.session.headers.items()}
-        self.session_cookies = self.session.cookies.get_dict()
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.id} {self.description})"
@@ -241,14 +454,16 @@ class InvoicingPeriod:
     def vat_percentage(self):
         """Get the VAT percentage for the invoicing period.
 
+        Returns the value fetched by :meth:`get_vat_percentage`, falling back
+        to a synchronous request if it has not been fetched yet.
+
         :return: VAT percentage
         :rtype: float
         """
-        if self._vat_percentage:
+        if self._vat_percentage is not None:
             return self._vat_percentage
         try:
-            start_day = self.start.strftime("%Y-%m-%d")
-            url = f"{self.api_url}/Periods/VatPercent/{start_day}"
+            url = self._vat_percentage_url()
             response = self.session.get(url)
             response.raise_for_status()
             self._vat_percentage = response.json()
@@ -257,6 +472,26 @@ class InvoicingPeriod:
             print(f'ERROR: {e}')
             return None
 
+    async def get_vat_percentage(self):
+        """Fetch the VAT percentage for the invoicing period on the shared aiohttp session.
+
+        :return: VAT percentage
+        :rtype: float
+        """
+        if self._vat_percentage is not None:
+            return self._vat_percentage
+        try:
+            self._vat_percentage = await self.parent.parent.parent.get_cached_json(self._vat_percentage_url())
+            return self._vat_percentage
+        except (aiohttp.ClientError, orjson.JSONDecodeError, asyncio.TimeoutError) as e:
+            # Leave it unset, the vat_percentage property retries synchronously
+            print(f'ERROR: VAT percentage for {self.description}: {e!r}')
+            return None
+
+    def _vat_percentage_url(self):
+        start_day = self.start.strftime("%Y-%m-%d")
+        return f"{self.api_url}/Periods/VatPercent/{start_day}"
+
     @property
     def total_consumption(self):
         """Get the total consumption for the invoicing period.
@@ -264,10 +499,7 @@ class InvoicingPeriod:
         :return: Total consumption
         :rtype: float
         """
-        if self._total_consumption:
-            return self._total_consumption
-        if self.hourly_data is not None:
-            return self.hourly_data['Consumption'].sum() * 1000
+        return self._aggregate('_total_consumption')
 
     @property
     def total_fixed_consumption(self):
@@ -276,10 +508,7 @@ class InvoicingPeriod:
         :return: Total consumption
         :rtype: float
         """
-        if self._total_fixed_consumption:
-            return self._total_fixed_consumption
-        if self.hourly_data is not None:
-            return self.hourly_data['FixedConsumption'].sum() * 1000
+        return self._aggregate('_total_fixed_consumption')
 
 
     @property
@@ -289,10 +518,7 @@ class InvoicingPeriod:
         :return: Total consumption
         :rtype: float
         """
-        if self._total_open_consumption:
-            return self._total_open_consumption
-        if self.hourly_data is not None:
-            return self.hourly_data['OpenConsumption'].sum() * 1000
+        return self._aggregate('_total_open_consumption')
 
     @property
     def total_weighted_spot_price(self):
@@ -301,9 +527,10 @@ class InvoicingPeriod:
         :return: Total weighted spot price
         :rtype: float
         """
-        if self._total_spot_price:
-            return self._total_spot_price
-        return self.weighted_spot_price + self.delivery_price + self.profile_price
+        if self._total_weighted_spot_price is not None:
+            return self._total_weighted_spot_price
+        self._total_weighted_spot_price = self.weighted_spot_price + self.delivery_price + self.profile_price
+        return self._total_weighted_spot_price
 
     @property
     def total_spot_price(self):
@@ -312,9 +539,10 @@ class InvoicingPeriod:
         :return: Total spot price
         :rtype: float
         """
-        if self._total_spot_price:
+        if self._total_spot_price is not None:
             return self._total_spot_price
-        return self.average_spot_price + self.delivery_price + self.profile_price
+        self._total_spot_price = self.average_spot_price + self.delivery_price + self.profile_price
+        return self._total_spot_price
 
     @property
     def total_fixed_price(self):
@@ -323,12 +551,13 @@ class InvoicingPeriod:
         :return: Total fixed price
         :rtype: float
         """
-        if self._total_fixed_price:
+        if self._total_fixed_price is not None:
             return self._total_fixed_price
         if self.average_fixed_price > 0:
-            return self.average_fixed_price + self.delivery_price + self.profile_price
+            self._total_fixed_price = self.average_fixed_price + self.delivery_price + self.profile_price
         else:
-            return 0
+            self._total_fixed_price = 0
+        return self._total_fixed_price
 
     @property
     def what_if_spot_cost(self):
@@ -337,62 +566,80 @@ class InvoicingPeriod:
         :return: Total spot cost
         :rtype: float
         """
-        if self._what_if_spot_cost:
+        if self._what_if_spot_cost is not None:
             return self._what_if_spot_cost
         fully_charged_price = self.hourly_data['SpotPrice'] + self.hourly_data['DeliveryPrice'] + self.hourly_data['ProfilePrice']
-        return (self.hourly_data['Consumption'] * fully_charged_price).sum()
+        self._what_if_spot_cost = (self.hourly_data['Consumption'] * fully_charged_price).sum()
+        return self._what_if_spot_cost
 
 
     @property
     def open_consumption_cost(self):
-        if self._open_consumption_cost:
+        if self._open_consumption_cost is not None:
             return self._open_consumption_cost
         fully_charged_price = self.hourly_data['SpotPrice'] + self.hourly_data['DeliveryPrice'] + self.hourly_data['ProfilePrice']
-        return (self.hourly_data['OpenConsumption'] * fully_charged_price).sum()
+        self._open_consumption_cost = (self.hourly_data['OpenConsumption'] * fully_charged_price).sum()
+        return self._open_consumption_cost
 
     @property
     def fixed_consumption_cost(self):
-        if self._fixed_consumption_cost:
+        if self._fixed_consumption_cost is not None:
             return self._fixed_consumption_cost
         fully_charged_price = self.hourly_data['FixedPrice'] + self.hourly_data['DeliveryPrice'] + self.hourly_data['ProfilePrice']
-        return (self.hourly_data['FixedConsumption'] * fully_charged_price ).sum()
+        self._fixed_consumption_cost = (self.hourly_data['FixedConsumption'] * fully_charged_price).sum()
+        return self._fixed_consumption_cost
 
     @property
     def average_spot_price(self):
-        if self._average_fixed_price:
-            return self._average_fixed_price
-        if self.hourly_data is not None:
-            return (self.hourly_data['SpotPrice'].mean() / 10)
+        return self._aggregate('_average_spot_price')
 
     @property
     def average_fixed_price(self):
-        if self._average_fixed_price:
-            return self._average_fixed_price
-        if self.hourly_data is not None:
-            return (self.hourly_data['FixedPrice'].mean() / 10)
+        return self._aggregate('_average_fixed_price')
 
     @property
     def profile_price(self):
-        if self._profile_price:
-            return self._profile_price
-        if self.hourly_data is not None:
-            return (self.hourly_data['ProfilePrice'].mean() / 10)
+        return self._aggregate('_profile_price')
 
     @property
     def delivery_price(self):
-        if self._delivery_price:
-            return self._delivery_price
-        if self.hourly_data is not None:
-            return (self.hourly_data['DeliveryPrice'].mean() / 10)
+        return self._aggregate('_delivery_price')
 
     @property
     def weighted_spot_price(self):
-        if self._weighted_spot_price:
-            return self._weighted_spot_price
-        if self.hourly_data is not None:
-            total_cost = (self.hourly_data['SpotPrice'] * self.hourly_data['Consumption']).sum()
-            total_consumption = self.hourly_data['Consumption'].sum()
-            return (total_cost / total_consumption) / 10
+        return self._aggregate('_weighted_spot_price')
+
+    def _compute_aggregates(self):
+        """Compute the per-period aggregates in a single pass over the hourly data.
+
+        Missing hours (NaN) are skipped, as the per-column pandas reductions did.
+        """
+        # Stacking the column arrays is much cheaper than materializing df[AGGREGATE_COLUMNS]
+        values = np.stack([self.hourly_data[column].to_numpy() for column in AGGREGATE_COLUMNS])
+        sums = np.nansum(values, axis=1)
+        counts = np.count_nonzero(~np.isnan(values), axis=1)
+        # Not np.nanmean, which warns on the all-NaN FixedPrice of spot-only contracts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        (self._average_spot_price, self._average_fixed_price,
+         self._profile_price, self._delivery_price) = (means[:4] / 10).tolist()
+        (self._total_consumption, self._total_fixed_consumption,
+         self._total_open_consumption) = (sums[4:] * 1000).tolist()
+        spot_price, consumption = values[0], values[4]
+        if counts[0] == counts[4] == values.shape[1]:
+            total_cost = float(spot_price @ consumption)
+        else:
+            # Only build the NaN mask when some hours are missing
+            valid = ~(np.isnan(spot_price) | np.isnan(consumption))
+            total_cost = float(spot_price[valid] @ consumption[valid])
+        total_consumption = float(sums[4])
+        self._weighted_spot_price = total_cost / total_consumption / 10 if total_consumption else float('nan')
+
+    def _aggregate(self, attribute):
+        """Get one of the aggregates, computing all of them on first access."""
+        if getattr(self, attribute) is None and self.hourly_data is not None:
+            self._compute_aggregates()
+        return getattr(self, attribute)
 
     def get_with_vat(self, price):
         return price * (1 + self.vat_percentage / 100)
@@ -407,7 +654,12 @@ class InvoicingPeriod:
             return self.hourly_data
         if os.path.exists(cache_file):
             cache_data = pd.read_pickle(cache_file)
-            last_data = datetime.strptime(cache_data['TimeStamp'].iloc[-1], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=ZoneInfo("UTC")).astimezone(self.time_zone)
+            if not isinstance(cache_data['TimeStamp'].dtype, pd.DatetimeTZDtype):
+                # Older caches stored the raw TimeStamp strings and untyped (e.g. all-None) columns
+                cache_data = cache_data.astype(HOURLY_DATA_DTYPES)
+                cache_data['TimeStamp'] = pd.to_datetime(cache_data['TimeStamp'], format="%Y-%m-%dT%H:%M:%SZ",
+                                                         utc=True).dt.tz_convert(self.time_zone)
+            last_data = cache_data['TimeStamp'].iloc[-1]
             # Check if the cached data of the previous month is having data until the last hour of the last day of the month
             if self.current_month != current_month and last_data.strftime('%Y-%m-%d') == self.stop.strftime('%Y-%m-%d'):
                 print("Using cached hourly data for", self.description)
@@ -417,35 +669,57 @@ class InvoicingPeriod:
                 print("The cached data is not complete for", self.description)
         #Otherwise, fetch the data from the server
         try:
-            async with aiohttp.ClientSession(headers=self.session_headers, cookies=self.session_cookies) as session:
-                url = f"{self.api_url}/Customer/Invoicing/HourlyData/{self.id}/{self.parent.id}"
-                async with session.get(url) as response:
-                    #response.raise_for_status()
-                    self.hourly_data = await response.json()
-                    print("Fetched hourly data from server for", self.description)
-                    self.hourly_data = pd.DataFrame(self.hourly_data)
-                    self.hourly_data.to_pickle(cache_file)
-                    return self.hourly_data
-        except aiohttp.ClientResponseError as e:
-            print(f'ERROR: {e}')
+            session = self.parent.parent.parent.aiohttp_session
+            url = f"{self.api_url}/Customer/Invoicing/HourlyData/{self.id}/{self.parent.id}"
+            async with session.get(url) as response:
+                response.raise_for_status()
+                data = orjson.loads(await response.read())
+                print("Fetched hourly data from server for", self.description)
+                hourly_data = pd.DataFrame.from_records(data, columns=HOURLY_DATA_COLUMNS)
+                hourly_data = hourly_data.astype(HOURLY_DATA_DTYPES, copy=False)
+                hourly_data['TimeStamp'] = pd.to_datetime(hourly_data['TimeStamp'], format="%Y-%m-%dT%H:%M:%SZ",
+                                                          utc=True).dt.tz_convert(self.time_zone)
+                self.hourly_data = hourly_data
+                self.hourly_data.to_pickle(cache_file)
+                return self.hourly_data
+        except (aiohttp.ClientResponseError, orjson.JSONDecodeError) as e:
+            print(f'ERROR: hourly data for {self.description}: {e}')
             return None
 
     def download_csv(self, filename=None):
+        """Write the hourly data to a CSV file.
+
+        The file is written with pyarrow when it is installed and with pandas
+        otherwise. Both produce the same header and ISO 8601 timestamps
+        (``2024-01-01T02:00:00+0200``), but pyarrow writes whole floats
+        without a trailing ``.0`` (``1`` instead of ``1.0``).
+
+        :param filename: Output file, defaults to ``HourlyData_<first day>-<last day>.csv``
+        :type filename: str
+        """
         data = self.hourly_data
         if data is None or len(data) == 0:
             print("No hourly data to download.")
             return
 
         if not filename:
-            first_timestamp = datetime.strptime(data['TimeStamp'].iloc[0], "%Y-%m-%dT%H:%M:%SZ").replace(
-                tzinfo=ZoneInfo("UTC"))
-            last_timestamp = datetime.strptime(data['TimeStamp'].iloc[-1], "%Y-%m-%dT%H:%M:%SZ").replace(
-                tzinfo=ZoneInfo("UTC"))
-            first_timestamp = first_timestamp.astimezone(self.time_zone)
-            last_timestamp = last_timestamp.astimezone(self.time_zone)
-            filename = f"HourlyData_{first_timestamp.strftime('%Y-%m-%d')}-{last_timestamp.strftime('%Y-%m-%d')}.csv"
-
-        data.to_csv(filename, index=False)
+            first_day = data['TimeStamp'].iloc[0].strftime('%Y-%m-%d')
+            last_day = data['TimeStamp'].iloc[-1].strftime('%Y-%m-%d')
+            filename = f"HourlyData_{first_day}-{last_day}.csv"
+
+        if pa is not None:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            index = table.schema.get_field_index('TimeStamp')
+            timestamps = table.column(index)
+            timestamps = pc.cast(timestamps, pa.timestamp('s', tz=timestamps.type.tz))
+            table = table.set_column(index, 'TimeStamp', pc.strftime(timestamps, format=CSV_DATE_FORMAT))
+            with open(filename, 'wb') as csv_file:
+                # pyarrow always quotes the header names, write it the way pandas does
+                csv_file.write((",".join(table.column_names) + "\n").encode())
+                pacsv.write_csv(table, csv_file,
+                                write_options=pacsv.WriteOptions(include_header=False, quoting_style="none"))
+        else:
+            data.to_csv(filename, index=False, date_format=CSV_DATE_FORMAT, lineterminator="\n")
         print(f"Hourly data successfully downloaded to {filename}.")
 
 